@@ -0,0 +1,13 @@
+# db_url.py
+import os
+
+def normalize_database_url(url: str) -> str:
+    """Point postgres:// / postgresql:// URLs (as Render hands them out) at the asyncpg driver"""
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+def get_database_url() -> str:
+    return normalize_database_url(os.getenv("DATABASE_URL"))
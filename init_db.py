@@ -3,11 +3,12 @@ import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
 import os
+from db_url import get_database_url
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = get_database_url()
 
 async def init():
-    engine = create_async_engine(DATABASE_URL, echo=True)
+    engine = create_async_engine(DATABASE_URL, echo=os.getenv("SQL_ECHO", "0") == "1")
 
     async with engine.begin() as conn:
         # Create leads table if it doesn't exist
@@ -21,6 +22,75 @@ async def init():
         );
         """))
 
+        # Columns the app reads/writes beyond the original schema
+        for column in (
+            "realist_data JSONB",
+            "raw_data TEXT",
+            "created_at TIMESTAMP DEFAULT now()",
+            "agent_notes TEXT",
+            "reviewed_at TIMESTAMP",
+        ):
+            await conn.execute(text(f"ALTER TABLE leads ADD COLUMN IF NOT EXISTS {column}"))
+
+        # Older databases stored realist_data as JSON text; converting rewrites the table,
+        # so only do it while the column isn't jsonb yet
+        realist_type = (await conn.execute(text("""
+        SELECT udt_name FROM information_schema.columns
+        WHERE table_name = 'leads' AND column_name = 'realist_data'
+        """))).scalar_one()
+        if realist_type != "jsonb":
+            await conn.execute(text(
+                "ALTER TABLE leads ALTER COLUMN realist_data TYPE JSONB USING realist_data::jsonb"
+            ))
+
+        # Status becomes an enum; legacy free-text values are normalized first
+        await conn.execute(text("""
+        DO $$ BEGIN
+            CREATE TYPE lead_status AS ENUM (
+                'new', 'realist_added', 'contract_drafted', 'awaiting_review',
+                'docusign_ready', 'pending_signatures', 'completed', 'needs_attention'
+            );
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$;
+        """))
+        await conn.execute(text("""
+        UPDATE leads SET status = CASE
+            WHEN lower(trim(status::text)) IN (
+                'new', 'realist_added', 'contract_drafted', 'awaiting_review',
+                'docusign_ready', 'pending_signatures', 'completed'
+            ) THEN lower(trim(status::text))
+            ELSE 'needs_attention'
+        END::lead_status
+        WHERE status IS NULL OR status::text NOT IN (
+            'new', 'realist_added', 'contract_drafted', 'awaiting_review',
+            'docusign_ready', 'pending_signatures', 'completed', 'needs_attention'
+        )
+        """))
+
+        # Converting the column rewrites the table, so only do it while it is still text
+        status_type = (await conn.execute(text("""
+        SELECT udt_name FROM information_schema.columns
+        WHERE table_name = 'leads' AND column_name = 'status'
+        """))).scalar_one()
+        if status_type != "lead_status":
+            await conn.execute(text("ALTER TABLE leads ALTER COLUMN status DROP DEFAULT"))
+            await conn.execute(text(
+                "ALTER TABLE leads ALTER COLUMN status TYPE lead_status USING status::text::lead_status"
+            ))
+            await conn.execute(text("ALTER TABLE leads ALTER COLUMN status SET DEFAULT 'new'"))
+        await conn.execute(text("ALTER TABLE leads ALTER COLUMN status SET NOT NULL"))
+
+        # Dashboard walks each status newest-id first; /deadlines and follow-ups filter by status.
+        # Nothing orders by created_at any more, so the older created_at indexes are dropped.
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS leads_status_id_idx ON leads (status, id DESC)"
+        ))
+        await conn.execute(text("DROP INDEX IF EXISTS leads_status_created_idx"))
+        await conn.execute(text("DROP INDEX IF EXISTS leads_created_idx"))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS leads_realist_mls_idx ON leads ((realist_data->>'mls_number'))"
+        ))
+
     await engine.dispose()
     print("✅ Database initialized!")
 
@@ -2,17 +2,17 @@
 import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
-import os
+from db_url import get_database_url
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = get_database_url()
 
 async def list_leads():
     engine = create_async_engine(DATABASE_URL, echo=False)
     async with engine.connect() as conn:
         result = await conn.execute(text("SELECT id, name, email, service, status FROM leads"))
-        rows = result.fetchall()
+        rows = result.mappings().all()
         for row in rows:
-            print(dict(row._mapping))  # <-- FIXED
+            print(dict(row))
     await engine.dispose()
 
 if __name__ == "__main__":
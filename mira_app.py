@@ -8,155 +8,347 @@ Major additions for Hosea's workflow:
 """
 
 import os
-import json
+import logging
+import logging.handlers
+import queue
+import re
+import asyncio
 import datetime
-from typing import Optional, Dict, Any
-from fastapi import FastAPI, Request, BackgroundTasks, Body, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
+import time
+import gzip
+import hashlib
+import functools
+import tempfile
+import concurrent.futures
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Union, BinaryIO
+from fastapi import FastAPI, Request, BackgroundTasks, Body, UploadFile, File, HTTPException, Depends, Query
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, Response
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.datastructures import Headers, MutableHeaders
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy import text
-import pdfplumber
-from PyPDF2 import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
+import asyncpg
+from db_url import get_database_url
+import orjson
+try:
+    import pymupdf  # PyMuPDF — fast C text extraction
+except ImportError:
+    pymupdf = None
+try:
+    import pdfplumber  # Fallback when PyMuPDF wheels aren't available for the platform
+except ImportError:
+    pdfplumber = None
+if pymupdf is None and pdfplumber is None:
+    raise ImportError("Realist PDF parsing needs PyMuPDF or pdfplumber installed")
+import pikepdf
 from io import BytesIO
 
-# Single FastAPI app instance
-app = FastAPI()
+# Handlers only enqueue records; formatting and the stdout write happen on the listener's thread
+class RawQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The queue never leaves the process, so skip QueueHandler's eager format() and
+        # let the listener's handler build the message. Log args must not be mutated afterwards.
+        return record
+
+LOG_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+LOG_LISTENER = logging.handlers.QueueListener(LOG_QUEUE, logging.StreamHandler(), respect_handler_level=True)
+logger = logging.getLogger("mira")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.addHandler(RawQueueHandler(LOG_QUEUE))
+logger.propagate = False
 
 # Templates setup
 templates = Jinja2Templates(directory="templates")
+templates.env.auto_reload = False  # Compiled templates stay cached; no mtime check per render
+DASHBOARD_TEMPLATE = templates.get_template("dashboard.html")  # Parsed and compiled once at import
+
+# Normalized once per process: SQLAlchemy gets the asyncpg dialect URL, the raw pool the plain DSN
+DATABASE_URL = get_database_url()
+ASYNCPG_DSN = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+# Shared async engine — one connection pool per process. Only the webhook, follow-ups and
+# health check go through it (the rest use POOL), so it stays small: per worker this is at
+# most 10 here + 20 in POOL
+ENGINE = create_async_engine(
+    DATABASE_URL,
+    echo=os.getenv("SQL_ECHO", "0") == "1",
+    pool_size=5,
+    max_overflow=5,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    connect_args={
+        # JIT-compiling asyncpg's type introspection queries stalls the first connect
+        "server_settings": {"jit": "off", "application_name": "mira"},
+        # Reuse server-side prepared plans for the repeated SELECT/UPDATE statements
+        "prepared_statement_cache_size": 500,
+        "statement_cache_size": 1024
+    }
+)
+
+# Raw asyncpg pool for hot single-statement writes — skips SQLAlchemy's text()/execute layer.
+# asyncpg prepares each $n statement once per connection and reuses it.
+POOL: Optional[asyncpg.Pool] = None
+
+async def init_pool_connection(conn):
+    # realist_data is JSONB — decode straight to dicts (and encode dicts) on the wire
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=lambda value: orjson.dumps(value).decode(),
+        decoder=orjson.loads,
+        schema="pg_catalog"
+    )
+
+# Sessions for the SQLAlchemy-backed routes, injected via Depends(get_db)
+SessionLocal = async_sessionmaker(ENGINE, expire_on_commit=False)
+
+async def get_db():
+    async with SessionLocal() as session:
+        yield session
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global POOL
+    LOG_LISTENER.start()
+    POOL = await asyncpg.create_pool(
+        ASYNCPG_DSN,
+        min_size=5,
+        max_size=20,
+        max_inactive_connection_lifetime=300,
+        statement_cache_size=1024,
+        server_settings={"jit": "off", "application_name": "mira"},
+        init=init_pool_connection
+    )
+    yield
+    await POOL.close()
+    await ENGINE.dispose()
+    LOG_LISTENER.stop()
+
+# Single FastAPI app instance; JSON responses are serialized with orjson
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
-# Database helper function
-def get_database_url():
-    DATABASE_URL = os.getenv("DATABASE_URL")
-    if DATABASE_URL.startswith("postgres://"):
-        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
-    elif DATABASE_URL.startswith("postgresql://"):
-        DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
-    return DATABASE_URL
+# ===== Response compression =====
+# Dashboard HTML and JSON listings compress well; PDFs are already compressed and
+# keep their stat-based Content-Length, so anything else passes through untouched
+GZIP_CONTENT_TYPES = ("text/html", "application/json")
+
+class TextGZipMiddleware:
+    """
+    Gzip single-body HTML/JSON responses. Built on plain ASGI messages rather than
+    Starlette's GZipResponder internals, which change between releases.
+    """
+    def __init__(self, app, minimum_size: int = 1024, compresslevel: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        held_start = None
+
+        async def send_compressed(message):
+            nonlocal held_start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if headers.get("content-type", "").startswith(GZIP_CONTENT_TYPES) and "content-encoding" not in headers:
+                    # Hold the headers until the body shows whether it's worth compressing
+                    held_start = message
+                    return
+            elif message["type"] == "http.response.body" and held_start is not None:
+                start, held_start = held_start, None
+                body = message.get("body", b"")
+                # Streamed or tiny bodies go out unchanged
+                if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                    body = gzip.compress(body, compresslevel=self.compresslevel)
+                    headers = MutableHeaders(raw=start["headers"])
+                    headers["Content-Encoding"] = "gzip"
+                    headers["Content-Length"] = str(len(body))
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+# Tiny bodies aren't worth the CPU
+app.add_middleware(TextGZipMiddleware, minimum_size=1024)
+
+# Contract template bytes, read from disk once per path and shared across requests
+@functools.lru_cache(maxsize=8)
+def load_template_bytes(template_path: str) -> bytes:
+    with open(template_path, "rb") as f:
+        return f.read()
 
 # ===== FIXED: Working PDF overlay function =====
+# === Page 1 Field Mappings (coordinates in points) ===
+# Note: (0,0) is bottom-left, Letter = 612x792
+OVERLAY_FIELDS = [
+    ("buyer_name", 90, 735),        # Buyer Name (top left, line 1)
+    ("property_address", 140, 695), # Property Address line
+    ("price", 100, 560),            # Purchase Price box (bottom left ~ line 30)
+    ("mls", 500, 695)               # MLS # small box on right
+]
+OVERLAY_FONT_SIZE = 9  # Small, contract-friendly Helvetica
+
+def pdf_literal(value: str) -> bytes:
+    """Encode text as an escaped PDF literal string body (WinAnsi)"""
+    raw = value.encode("cp1252", errors="replace")
+    for char, escaped in ((b"\\", b"\\\\"), (b"(", b"\\("), (b")", b"\\)"), (b"\r", b" "), (b"\n", b" ")):
+        raw = raw.replace(char, escaped)
+    return raw
+
 def autopopulate_purchase_agreement(input_pdf_path, output_pdf_path, fields: Dict[str, str]):
     """
     Page 1 overlay for Virginia REIN Purchase Agreement
     Writes Buyer, Property Address, Price, MLS# into correct blanks.
+    Text operators go straight into the page content stream — no reportlab canvas.
     """
-    packet = BytesIO()
-    can = canvas.Canvas(packet, pagesize=letter)
-
-    # Set small, contract-friendly font
-    can.setFont("Helvetica", 9)
-
-    # === Page 1 Field Mappings (coordinates in points) ===
-    # Note: (0,0) is bottom-left, Letter = 612x792
-
-    # Buyer Name (top left, line 1)
-    can.drawString(90, 735, fields.get("buyer_name", ""))
-
-    # Property Address line
-    can.drawString(140, 695, fields.get("property_address", ""))
-
-    # Purchase Price box (bottom left ~ line 30)
-    can.drawString(100, 560, fields.get("price", ""))
-
-    # MLS # small box on right
-    can.drawString(500, 695, fields.get("mls", ""))
-
-    can.save()
-    packet.seek(0)
-
-    # ===== Merge with Template =====
-    overlay_pdf = PdfReader(packet)
-    base_pdf = PdfReader(open(input_pdf_path, "rb"))
-    writer = PdfWriter()
+    with pikepdf.open(BytesIO(load_template_bytes(input_pdf_path))) as base_pdf:
+        page = base_pdf.pages[0]
+        font = page.add_resource(
+            pikepdf.Dictionary(
+                Type=pikepdf.Name.Font,
+                Subtype=pikepdf.Name.Type1,
+                BaseFont=pikepdf.Name.Helvetica,
+                Encoding=pikepdf.Name.WinAnsiEncoding
+            ),
+            pikepdf.Name.Font,
+            prefix="Mira"
+        )
 
-    # Merge page 1 with overlay
-    base_page = base_pdf.pages[0]
-    base_page.merge_page(overlay_pdf.pages[0])
-    writer.add_page(base_page)
+        overlay = [b"\nQ\nBT", b"%s %d Tf" % (str(font).encode(), OVERLAY_FONT_SIZE)]
+        for field, x, y in OVERLAY_FIELDS:
+            overlay.append(b"1 0 0 1 %d %d Tm (%s) Tj" % (x, y, pdf_literal(fields.get(field, ""))))
+        overlay.append(b"ET\n")
 
-    # Copy rest of base unchanged
-    for i in range(1, len(base_pdf.pages)):
-        writer.add_page(base_pdf.pages[i])
+        # Isolate the template's graphics state so the overlay draws in default user space
+        page.contents_add(pikepdf.Stream(base_pdf, b"q\n"), prepend=True)
+        page.contents_add(pikepdf.Stream(base_pdf, b"\n".join(overlay)))
 
-    with open(output_pdf_path, "wb") as out_f:
-        writer.write(out_f)
+        # Write beside the target and swap it in, so a download never sees a half-written PDF
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_pdf_path) or ".", suffix=".tmp")
+        os.close(fd)
+        try:
+            base_pdf.save(tmp_path)
+            os.replace(tmp_path, output_pdf_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
 
 # ===== NEW: REALIST PDF PARSER =====
-def extract_realist_data(pdf_file_path: str) -> Dict[str, Any]:
+# Line patterns for each Realist field, compiled once at import.
+# The first matching line wins; the whole stripped line is stored.
+FIELD_PATTERNS = {
+    # Two-condition fields are anchored so search() checks the line once instead of
+    # re-running both lookaheads from every start position (quadratic in line length)
+    "property_address": re.compile(r"^(?=.*\baddress)(?=.*\d)", re.IGNORECASE),
+    "listing_price": re.compile(r"^(?=.*\$)(?=.*(?:\bprice|\blist))", re.IGNORECASE),
+    "mls_number": re.compile(r"^(?=.*\bmls)(?=.*\d)", re.IGNORECASE),
+    "square_footage": re.compile(r"\bsq\.?\s*(?:ft|feet)\b|\bsquare\s+f(?:ee)?t\b", re.IGNORECASE),
+    "lot_size": re.compile(r"\blot\s+size\b", re.IGNORECASE),
+    "year_built": re.compile(r"\byear\s+built\b", re.IGNORECASE),
+    "bedrooms": re.compile(r"\bbed(?:room)?s?\b", re.IGNORECASE),
+    "bathrooms": re.compile(r"\bbath(?:room)?s?\b", re.IGNORECASE),
+    "property_type": re.compile(r"\btype\b", re.IGNORECASE),
+    "tax_id": re.compile(r"\btax\s+id\b|\bparcel\b", re.IGNORECASE),
+    "legal_description": re.compile(r"\blegal\b", re.IGNORECASE),
+    "subdivision": re.compile(r"\bsubdivision\b", re.IGNORECASE),
+    "zoning": re.compile(r"\bzoning\b", re.IGNORECASE),
+    "assessed_value": re.compile(r"\bassess(?:ed|ment)\b", re.IGNORECASE),
+    "owner_of_record": re.compile(r"\bowner(?:s|\s+of\s+record)?\b", re.IGNORECASE),
+    "listing_agent": re.compile(r"\blist(?:ing)?\s+agent\b", re.IGNORECASE),
+    "listing_office": re.compile(r"\blist(?:ing)?\s+office\b", re.IGNORECASE)
+}
+
+# Per-page time budget for the pdfplumber fallback. It bounds how long an upload waits,
+# not how much work is done: Python threads can't be killed, so a page that overruns keeps
+# parsing in the background until it finishes on its own.
+PDF_PAGE_TIMEOUT = 2.0
+
+def extract_pdf_text(pdf_file: Union[str, BinaryIO], max_pages: int = 3) -> str:
+    """
+    Raw text of the first pages of a PDF (path or binary file object), one page per block
+    Uses PyMuPDF when installed, otherwise pdfplumber
+    """
+    if pymupdf is not None:
+        if isinstance(pdf_file, str):
+            doc = pymupdf.open(pdf_file)
+        else:
+            doc = pymupdf.open(stream=pdf_file.read(), filetype="pdf")
+        with doc:
+            return "\n".join(
+                doc.load_page(i).get_text("text")
+                for i in range(min(max_pages, doc.page_count))
+            )
+    
+    # Only load the pages we need; no laparams so pdfminer's layout analysis is skipped
+    # Each upload gets its own worker thread, so an overrunning page only ties up that
+    # upload's thread and the timeout never includes time spent queued behind other uploads
+    page_texts = []
+    straggler = None
+    pdf = pdfplumber.open(pdf_file, pages=list(range(1, max_pages + 1)))
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    try:
+        for page in pdf.pages:
+            future = executor.submit(page.extract_text, x_tolerance=3, y_tolerance=3)
+            try:
+                page_texts.append(future.result(timeout=PDF_PAGE_TIMEOUT) or "")
+            except concurrent.futures.TimeoutError:
+                # Pathological page — give up on it and the rest rather than stall the request
+                logger.warning("Realist PDF page %s exceeded %ss, skipping remaining pages", page.page_number, PDF_PAGE_TIMEOUT)
+                straggler = future
+                break
+    finally:
+        executor.shutdown(wait=False)
+        # Don't close the document underneath a page that is still being parsed
+        if straggler is not None:
+            straggler.add_done_callback(lambda _: pdf.close())
+        else:
+            pdf.close()
+    return "\n".join(page_texts)
+
+def match_realist_fields(text_content: str) -> Dict[str, Any]:
+    """
+    Map each Realist field to the first line of text that matches its pattern
+    """
+    extracted_data = {field: "" for field in FIELD_PATTERNS}
+    pending = dict(FIELD_PATTERNS)
+    for line in text_content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        for field, pattern in list(pending.items()):
+            if pattern.search(line):
+                extracted_data[field] = line
+                del pending[field]
+        if not pending:
+            break
+    return extracted_data
+
+def extract_realist_data(pdf_file: Union[str, BinaryIO]) -> Dict[str, Any]:
     """
     Extract property data from Realist MLS PDF
     Includes Tax ID, legal desc, subdivision, zoning, owners, etc.
     """
-    extracted_data = {
-        "property_address": "",
-        "listing_price": "",
-        "mls_number": "",
-        "square_footage": "",
-        "lot_size": "",
-        "year_built": "",
-        "bedrooms": "",
-        "bathrooms": "",
-        "property_type": "",
-        "tax_id": "",
-        "legal_description": "",
-        "subdivision": "",
-        "zoning": "",
-        "assessed_value": "",
-        "owner_of_record": "",
-        "listing_agent": "",
-        "listing_office": ""
-    }
-    
     try:
-        with pdfplumber.open(pdf_file_path) as pdf:
-            text_content = ""
-            for page_num in range(min(3, len(pdf.pages))):
-                text_content += pdf.pages[page_num].extract_text() or ""
-            
-            lines = text_content.split('\n')
-            for line in lines:
-                line_lower = line.lower().strip()
-                
-                if 'address' in line_lower and any(char.isdigit() for char in line):
-                    extracted_data["property_address"] = line.strip()
-                if '$' in line and ('price' in line_lower or 'list' in line_lower):
-                    extracted_data["listing_price"] = line.strip()
-                if 'mls' in line_lower and any(char.isdigit() for char in line):
-                    extracted_data["mls_number"] = line.strip()
-                if 'sq' in line_lower and 'ft' in line_lower:
-                    extracted_data["square_footage"] = line.strip()
-                if 'lot size' in line_lower:
-                    extracted_data["lot_size"] = line.strip()
-                if 'year built' in line_lower:
-                    extracted_data["year_built"] = line.strip()
-                if 'bed' in line_lower:
-                    extracted_data["bedrooms"] = line.strip()
-                if 'bath' in line_lower:
-                    extracted_data["bathrooms"] = line.strip()
-                if 'type' in line_lower:
-                    extracted_data["property_type"] = line.strip()
-                if 'tax id' in line_lower or 'parcel' in line_lower:
-                    extracted_data["tax_id"] = line.strip()
-                if 'legal' in line_lower:
-                    extracted_data["legal_description"] = line.strip()
-                if 'subdivision' in line_lower:
-                    extracted_data["subdivision"] = line.strip()
-                if 'zoning' in line_lower:
-                    extracted_data["zoning"] = line.strip()
-                if 'assessed' in line_lower or 'assessment' in line_lower:
-                    extracted_data["assessed_value"] = line.strip()
-                if 'owner' in line_lower:
-                    extracted_data["owner_of_record"] = line.strip()
-    
+        return match_realist_fields(extract_pdf_text(pdf_file))
     except Exception as e:
-        print(f"Error extracting Realist data: {e}")
-    
-    return extracted_data
+        logger.error("Error extracting Realist data: %s", e)
+        return {field: "" for field in FIELD_PATTERNS}
 
 # ===== NEW: DEADLINE TRACKING SYSTEM =====
+# Standard Virginia purchase agreement timelines (days after contract date)
+PURCHASE_DEADLINE_DAYS = {
+    "inspection_period": 10,
+    "financing_contingency": 21,
+    "appraisal_contingency": 21,
+    "settlement_date": 30,
+    "title_commitment": 15
+}
+
 def calculate_transaction_deadlines(contract_date: datetime.date, contract_type: str = "purchase") -> Dict[str, datetime.date]:
     """
     NEW FUNCTION: Calculate critical deadlines based on contract execution date
@@ -165,12 +357,8 @@ def calculate_transaction_deadlines(contract_date: datetime.date, contract_type:
     deadlines = {}
     
     if contract_type == "purchase":
-        # Standard Virginia purchase agreement timelines
-        deadlines["inspection_period"] = contract_date + datetime.timedelta(days=10)
-        deadlines["financing_contingency"] = contract_date + datetime.timedelta(days=21)
-        deadlines["appraisal_contingency"] = contract_date + datetime.timedelta(days=21)
-        deadlines["settlement_date"] = contract_date + datetime.timedelta(days=30)
-        deadlines["title_commitment"] = contract_date + datetime.timedelta(days=15)
+        for deadline_type, days in PURCHASE_DEADLINE_DAYS.items():
+            deadlines[deadline_type] = contract_date + datetime.timedelta(days=days)
     
     return deadlines
 
@@ -181,10 +369,10 @@ def generate_real_contract(lead_dict: Dict, realist_data: Dict = None) -> str:
     Integrates lead data + Realist property data
     """
     template_path = os.path.join("templates", "contracts", "Standard_Purchase_Agreement.pdf")
-    print(f"DEBUG: Looking for template at {template_path}")
+    logger.debug("Looking for template at %s", template_path)
     
     if not os.path.exists(template_path):
-        print("DEBUG: Template not found, falling back to demo contract")
+        logger.debug("Template not found, falling back to demo contract")
         # Fallback to demo generation if template not found
         return generate_demo_contract(lead_dict)
     
@@ -231,103 +419,141 @@ async def root():
     return {"status": "Mira v1.5 backend is alive 🚀 - Now with real contract autopopulation"}
 
 # ===== ENHANCED: DASHBOARD WITH NEW STATUS PIPELINE =====
-@app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request):
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-
-    async with engine.connect() as conn:
-        # NEW: Enhanced query to include Realist data and deadlines
-        result = await conn.execute(text("""
-            SELECT id, name, email, service, status, realist_data, created_at 
-            FROM leads ORDER BY created_at DESC
-        """))
-        raw_leads = result.fetchall()
-
-    await engine.dispose()
-
-    # NEW: Enhanced status pipeline for real transactions
-    leads_by_status = {
-        "🆕 New Leads": [],
-        "📋 Realist Data Added": [],
-        "📄 Contract Drafted": [],
-        "👀 Awaiting Agent Review": [],
-        "✍️ DocuSign Ready": [],
-        "⏰ Pending Signatures": [],
-        "✅ Completed": [],
-        "❓ Needs Attention": []
-    }
+# lead_status enum value → dashboard column, in pipeline order
+STATUS_MAP = {
+    "new": "🆕 New Leads",
+    "realist_added": "📋 Realist Data Added",
+    "contract_drafted": "📄 Contract Drafted",
+    "awaiting_review": "👀 Awaiting Agent Review",
+    "docusign_ready": "✍️ DocuSign Ready",
+    "pending_signatures": "⏰ Pending Signatures",
+    "completed": "✅ Completed",
+    "needs_attention": "❓ Needs Attention"
+}
+
+# Newest leads shown per dashboard column; a full column tells the agent to use /leads
+# for the rest, since older leads in that status are left off the page
+DASHBOARD_COLUMN_LIMIT = 100
+
+# One row per non-empty status, its newest leads already aggregated with only the fields
+# the template shows. Each status is a LIMITed walk of leads_status_id_idx, so the page
+# stays bounded as the table grows.
+DASHBOARD_SQL = f"""
+    SELECT s.status, recent.leads
+    FROM unnest(enum_range(NULL::lead_status)) AS s(status)
+    CROSS JOIN LATERAL (
+        SELECT jsonb_agg(
+            jsonb_build_object('id', id, 'name', name, 'email', email, 'status', status)
+            ORDER BY id DESC
+        ) AS leads
+        FROM (
+            SELECT id, name, email, status
+            FROM leads
+            WHERE leads.status = s.status
+            ORDER BY id DESC
+            LIMIT {DASHBOARD_COLUMN_LIMIT}
+        ) newest
+    ) recent
+    WHERE recent.leads IS NOT NULL
+"""
 
-    # Enhanced status mapping
-    status_map = {
-        "new": "🆕 New Leads",
-        "realist_added": "📋 Realist Data Added",
-        "contract_drafted": "📄 Contract Drafted",
-        "awaiting_review": "👀 Awaiting Agent Review",
-        "docusign_ready": "✍️ DocuSign Ready",
-        "pending_signatures": "⏰ Pending Signatures",
-        "completed": "✅ Completed"
-    }
+# Rendered dashboard shared across requests for a few seconds; any lead write
+# drops it so changes show up on the next load
+DASHBOARD_CACHE_TTL = 10
+DASHBOARD_CACHE: Dict[str, Any] = {"html": b"", "etag": "", "expires": 0.0, "generation": 0}
+DASHBOARD_CACHE_LOCK = asyncio.Lock()
 
-    for lead in raw_leads:
-        lead_dict = {
-            "id": lead[0],
-            "name": lead[1],
-            "email": lead[2],
-            "service": lead[3],
-            "status": lead[4],
-            "realist_data": lead[5],  # NEW: Realist data column
-            "created_at": lead[6]
-        }
+def invalidate_dashboard():
+    DASHBOARD_CACHE["generation"] += 1
+    DASHBOARD_CACHE["expires"] = 0.0
 
-        normalized = (lead_dict["status"] or "").strip().lower()
-        status_key = status_map.get(normalized, "❓ Needs Attention")
-        leads_by_status[status_key].append(lead_dict)
+async def render_dashboard():
+    # A write landing while this render is in flight bumps the generation; the result
+    # is still served but left expired so the next load picks up the write
+    generation = DASHBOARD_CACHE["generation"]
+    async with POOL.acquire() as conn:
+        grouped = await conn.fetch(DASHBOARD_SQL)
 
-    return templates.TemplateResponse(
-        "dashboard.html",
-        {"request": request, "leads": leads_by_status}
+    # NEW: Enhanced status pipeline for real transactions
+    leads_by_status = {label: [] for label in STATUS_MAP.values()}
+    for row in grouped:
+        leads_by_status[STATUS_MAP[row["status"]]] = row["leads"]
+
+    html = DASHBOARD_TEMPLATE.render(leads=leads_by_status, column_limit=DASHBOARD_COLUMN_LIMIT).encode()
+    DASHBOARD_CACHE.update(
+        html=html,
+        etag='"' + hashlib.blake2b(html, digest_size=8).hexdigest() + '"',
+        expires=time.monotonic() + DASHBOARD_CACHE_TTL if generation == DASHBOARD_CACHE["generation"] else 0.0
     )
 
-# Original Tally webhook (unchanged)
+@app.get("/dashboard", response_class=HTMLResponse)
+async def dashboard(request: Request):
+    # Concurrent misses wait on one query + render instead of each running their own
+    if DASHBOARD_CACHE["expires"] <= time.monotonic():
+        async with DASHBOARD_CACHE_LOCK:
+            if DASHBOARD_CACHE["expires"] <= time.monotonic():
+                await render_dashboard()
+
+    headers = {"ETag": DASHBOARD_CACHE["etag"], "Cache-Control": f"private, max-age={DASHBOARD_CACHE_TTL}"}
+    if request.headers.get("if-none-match") == DASHBOARD_CACHE["etag"]:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(DASHBOARD_CACHE["html"], headers=headers)
+
+# ===== Tally field dispatch =====
+def tally_text_value(ans: Dict[str, Any], current: str) -> str:
+    return ans.get("value") or current
+
+def tally_choice_value(ans: Dict[str, Any], current: str) -> str:
+    choice_ids = ans.get("value", [])
+    if not choice_ids:
+        return current
+    # Only the first choice is used, so find its option instead of mapping every option
+    return next((opt["text"] for opt in ans.get("options", []) if opt["id"] == choice_ids[0]), current)
+
+# Lowercased label → (lead field, value handler); exact labels are a single dict hit
+TALLY_EXACT_FIELDS = {
+    "email": ("email", tally_text_value)
+}
+# Labels that only need to contain the key, tried in order when there's no exact hit
+TALLY_SUBSTRING_FIELDS = (
+    ("full legal name", "name", tally_text_value),
+    ("how can mira help you today?", "service", tally_choice_value)
+)
+
+# Original Tally webhook
 @app.post("/tally_webhook")
-async def tally_webhook(payload: dict = Body(...)):
-    print("📩 Incoming Tally Webhook Payload:", payload)
+async def tally_webhook(payload: dict = Body(...), db: AsyncSession = Depends(get_db)):
+    logger.debug("📩 Incoming Tally Webhook Payload: %s", payload)
 
-    name, email, service = "Unknown", "unknown@example.com", "General Inquiry"
+    lead = {"name": "Unknown", "email": "unknown@example.com", "service": "General Inquiry"}
     
     for ans in payload.get("data", {}).get("fields", []):
-        label = ans.get("label", "").lower()
-        if "full legal name" in label:
-            name = ans.get("value") or name
-        elif label == "email" and ans.get("value"):
-            email = ans.get("value")
-        elif "how can mira help you today?" in label:
-            choice_ids = ans.get("value", [])
-            options = {opt["id"]: opt["text"] for opt in ans.get("options", [])}
-            if choice_ids:
-                service = options.get(choice_ids[0], service)
-
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-
-    async with engine.begin() as conn:
-        await conn.execute(
-            text("""
-                INSERT INTO leads (name, email, service, status, raw_data)
-                VALUES (:name, :email, :service, :status, :raw_data)
-            """),
-            {
-                "name": name,
-                "email": email,
-                "service": service,
-                "status": "new",
-                "raw_data": json.dumps(payload)
-            }
+        label = ans.get("label", "").lower().strip()
+        match = TALLY_EXACT_FIELDS.get(label) or next(
+            ((field, handler) for key, field, handler in TALLY_SUBSTRING_FIELDS if key in label),
+            None
         )
+        if match:
+            field, handler = match
+            lead[field] = handler(ans, lead[field])
+
+    result = await db.execute(
+        text("""
+            INSERT INTO leads (name, email, service, status, raw_data)
+            VALUES (:name, :email, :service, :status, :raw_data)
+            RETURNING id, name, email, service
+        """),
+        {
+            **lead,
+            "status": "new",
+            "raw_data": orjson.dumps(payload).decode()
+        }
+    )
+    inserted = dict(result.mappings().one())
+    await db.commit()
+    invalidate_dashboard()
 
-    await engine.dispose()
-    return {"success": True, "inserted": {"name": name, "email": email, "service": service}}
+    return {"success": True, "inserted": inserted}
 
 # ===== NEW: REALIST PDF UPLOAD ENDPOINT =====
 @app.post("/upload_realist/{lead_id}")
@@ -339,37 +565,24 @@ async def upload_realist_data(lead_id: int, file: UploadFile = File(...)):
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
-    # Save uploaded file temporarily
-    temp_path = f"temp_realist_{lead_id}.pdf"
-    with open(temp_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
-    # Extract property data
-    realist_data = extract_realist_data(temp_path)
+    # Extract property data straight from the upload's spooled file (no temp copy on disk),
+    # off the event loop since parsing is blocking
+    await file.seek(0)
+    realist_data = await asyncio.to_thread(extract_realist_data, file.file)
     
-    # Store in database
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-    
-    async with engine.begin() as conn:
+    # Store in database (JSONB — the pool codec encodes the dict)
+    async with POOL.acquire() as conn:
         await conn.execute(
-            text("""
+            """
                 UPDATE leads 
-                SET realist_data = :realist_data, status = :status 
-                WHERE id = :id
-            """),
-            {
-                "realist_data": json.dumps(realist_data),
-                "status": "realist_added",
-                "id": lead_id
-            }
+                SET realist_data = $1, status = $2 
+                WHERE id = $3
+            """,
+            realist_data,
+            "realist_added",
+            lead_id
         )
-    
-    await engine.dispose()
-    
-    # Clean up temp file
-    os.remove(temp_path)
+    invalidate_dashboard()
     
     return {
         "success": True,
@@ -379,68 +592,68 @@ async def upload_realist_data(lead_id: int, file: UploadFile = File(...)):
     }
 
 # ===== ENHANCED: REAL CONTRACT GENERATION =====
-@app.post("/generate_contract/{lead_id}")
-async def generate_contract(lead_id: int):
+# Status doesn't depend on the PDF output, so set it and read the lead in one statement
+MARK_CONTRACT_DRAFTED_SQL = """
+    UPDATE leads SET status = 'contract_drafted'
+    WHERE id = $1
+    RETURNING id, name, email, service, status, realist_data
+"""
+
+async def draft_contract_job(lead_dict: Dict, realist_data: Dict):
     """
-    ENHANCED: Generate real Virginia REIN contract with autopopulated data
-    Combines lead intake + Realist property data
+    Background job: build the PDF off the event loop, then flag the lead
+    contract_drafted (or needs_attention on failure) so clients polling
+    /lead/{id} always reach a final status
     """
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
+    try:
+        contract_path = await asyncio.to_thread(generate_real_contract, lead_dict, realist_data)
+        new_status = "contract_drafted"
+        logger.info("Contract ready for lead %s: %s", lead_dict["id"], contract_path)
+    except Exception as e:
+        new_status = "needs_attention"
+        logger.error("Error generating contract for lead %s: %s", lead_dict["id"], e)
 
-    async with engine.connect() as conn:
-        result = await conn.execute(
-            text("SELECT id, name, email, service, status, realist_data FROM leads WHERE id = :id"),
-            {"id": lead_id}
-        )
-        row = result.fetchone()
+    async with POOL.acquire() as conn:
+        await conn.execute("UPDATE leads SET status = $1 WHERE id = $2", new_status, lead_dict["id"])
+    invalidate_dashboard()
 
-    await engine.dispose()
+@app.post("/generate_contract/{lead_id}", status_code=202)
+async def generate_contract(lead_id: int, background_tasks: BackgroundTasks):
+    """
+    ENHANCED: Queue a real Virginia REIN contract with autopopulated data
+    Combines lead intake + Realist property data
+    Returns immediately; status flips to contract_drafted when the PDF is written
+    """
+    async with POOL.acquire() as conn:
+        row = await conn.fetchrow(
+            "SELECT id, name, email, service, status, realist_data FROM leads WHERE id = $1",
+            lead_id
+        )
 
     if not row:
         raise HTTPException(status_code=404, detail=f"Lead with id {lead_id} not found")
 
-    # Convert SQLAlchemy row → dict
-    lead_dict = {
-        "id": row[0],
-        "name": row[1],
-        "email": row[2],
-        "service": row[3],
-        "status": row[4],
-        "realist_data": row[5]
-    }
+    # Convert asyncpg record → dict
+    lead_dict = dict(row)
 
-    # Parse Realist data if available
-    realist_data = {}
-    if lead_dict["realist_data"]:
-        try:
-            realist_data = json.loads(lead_dict["realist_data"])
-        except:
-            realist_data = {}
+    # Realist data arrives as a dict via the JSONB codec
+    realist_data = lead_dict["realist_data"] or {}
 
-    # NEW: Generate real contract instead of demo
-    contract_path = generate_real_contract(lead_dict, realist_data)
+    # NEW: Generate real contract instead of demo — after the response is sent
+    background_tasks.add_task(draft_contract_job, lead_dict, realist_data)
     
     # NEW: Calculate transaction deadlines
     contract_date = datetime.date.today()
     deadlines = calculate_transaction_deadlines(contract_date)
     
-    # NEW: Update lead status to contract_drafted
-    engine = create_async_engine(DATABASE_URL, echo=False)
-    async with engine.begin() as conn:
-        await conn.execute(
-            text("UPDATE leads SET status = :status WHERE id = :id"),
-            {"status": "contract_drafted", "id": lead_id}
-        )
-    await engine.dispose()
-
     return {
         "success": True,
-        "contract_created": contract_path,
+        "status": "queued",
+        "lead_id": lead_id,
         "lead": lead_dict,
         "realist_data": realist_data,
         "deadlines": deadlines,  # NEW: Include calculated deadlines
-        "message": "Real estate contract generated and ready for agent review"
+        "message": f"Contract generation queued; poll /lead/{lead_id} until status is contract_drafted (needs_attention if it failed)"
     }
 
 # ===== NEW: GET LEAD DETAILS WITH REALIST DATA =====
@@ -450,52 +663,50 @@ async def get_lead_details(lead_id: int):
     NEW ENDPOINT: Get full lead details including Realist data and deadlines
     For agent review before contract finalization
     """
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-
-    async with engine.connect() as conn:
-        result = await conn.execute(
-            text("SELECT * FROM leads WHERE id = :id"),
-            {"id": lead_id}
+    async with POOL.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+                SELECT id, name, email, service, status, created_at,
+                       COALESCE(realist_data, '{}')::text AS realist_data,
+                       COALESCE(NULLIF(raw_data, ''), '{}') AS raw_data
+                FROM leads WHERE id = $1
+            """,
+            lead_id
         )
-        row = result.fetchone()
-
-    await engine.dispose()
 
     if not row:
         raise HTTPException(status_code=404, detail=f"Lead {lead_id} not found")
 
-    # Parse stored data
-    realist_data = {}
-    if row[5]:  # realist_data column
-        try:
-            realist_data = json.loads(row[5])
-        except:
-            pass
-
-    return {
-        "lead_id": row[0],
-        "name": row[1],
-        "email": row[2],
-        "service": row[3],
-        "status": row[4],
-        "realist_data": realist_data,
-        "created_at": row[6],
-        "raw_intake_data": json.loads(row[7]) if row[7] else {}
-    }
+    # Both JSON columns come back as serialized text and are spliced into the
+    # response as-is, with no parse/re-encode round trip through Python objects.
+    # Returned as a response so FastAPI's jsonable_encoder doesn't walk the content.
+    return ORJSONResponse({
+        "lead_id": row["id"],
+        "name": row["name"],
+        "email": row["email"],
+        "service": row["service"],
+        "status": row["status"],
+        "realist_data": orjson.Fragment(row["realist_data"]),
+        "created_at": row["created_at"],
+        "raw_intake_data": orjson.Fragment(row["raw_data"])
+    })
 
 # Enhanced download endpoint
 @app.get("/download_contract/{lead_id}")
 async def download_contract(lead_id: int):
     pdf_path = f"generated_contracts/PA_filled_{lead_id}.pdf"
-    if os.path.exists(pdf_path):
-        return FileResponse(
-            path=pdf_path,
-            filename=f"purchase_agreement_{lead_id}.pdf",
-            media_type="application/pdf"
-        )
-
-    raise HTTPException(status_code=404, detail=f"No PDF contract found for lead {lead_id}")
+    # Stat off the event loop; FileResponse reuses it for Content-Length instead of stat'ing again
+    try:
+        stat = await asyncio.to_thread(os.stat, pdf_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No PDF contract found for lead {lead_id}")
+
+    return FileResponse(
+        path=pdf_path,
+        filename=f"purchase_agreement_{lead_id}.pdf",
+        media_type="application/pdf",
+        stat_result=stat
+    )
 
 @app.post("/generate_and_download/{lead_id}")
 async def generate_and_download_contract(lead_id: int):
@@ -503,57 +714,37 @@ async def generate_and_download_contract(lead_id: int):
     NEW ENDPOINT: Generate a fresh Virginia REIN contract for this lead
     then immediately return the new PDF for download.
     """
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-
-    # 1. Grab lead data
-    async with engine.connect() as conn:
-        result = await conn.execute(
-            text("SELECT id, name, email, service, status, realist_data FROM leads WHERE id = :id"),
-            {"id": lead_id}
-        )
-        row = result.fetchone()
+    # 1. Grab lead data and mark it contract_drafted in the same round trip
+    async with POOL.acquire() as conn:
+        row = await conn.fetchrow(MARK_CONTRACT_DRAFTED_SQL, lead_id)
 
     if not row:
         raise HTTPException(status_code=404, detail=f"Lead with id {lead_id} not found")
+    invalidate_dashboard()
 
-    lead_dict = {
-        "id": row[0],
-        "name": row[1],
-        "email": row[2],
-        "service": row[3],
-        "status": row[4],
-        "realist_data": row[5]
-    }
-
-    realist_data = {}
-    if lead_dict["realist_data"]:
-        try:
-            realist_data = json.loads(lead_dict["realist_data"])
-        except:
-            realist_data = {}
+    lead_dict = dict(row)
 
-    # 2. Generate a fresh PDF contract
-    contract_path = generate_real_contract(lead_dict, realist_data)
+    realist_data = lead_dict["realist_data"] or {}
 
-    # 3. Update DB status → contract_drafted
-    async with engine.begin() as conn:
-        await conn.execute(
-            text("UPDATE leads SET status = :status WHERE id = :id"),
-            {"status": "contract_drafted", "id": lead_id}
-        )
-    await engine.dispose()
-
-    # 4. Immediately return the new PDF as a download
-    if os.path.exists(contract_path):
-        return FileResponse(
-            path=contract_path,
-            filename=f"purchase_agreement_{lead_id}.pdf",
-            media_type="application/pdf"
-        )
-    else:
+    # 2. Generate a fresh PDF contract; on failure flag the lead like draft_contract_job does
+    try:
+        contract_path = await asyncio.to_thread(generate_real_contract, lead_dict, realist_data)
+        if not os.path.exists(contract_path):
+            raise FileNotFoundError(contract_path)
+    except Exception as e:
+        logger.error("Error generating contract for lead %s: %s", lead_id, e)
+        async with POOL.acquire() as conn:
+            await conn.execute("UPDATE leads SET status = $1 WHERE id = $2", "needs_attention", lead_id)
+        invalidate_dashboard()
         raise HTTPException(status_code=500, detail="PDF generation failed")
 
+    # 3. Immediately return the new PDF as a download
+    return FileResponse(
+        path=contract_path,
+        filename=f"purchase_agreement_{lead_id}.pdf",
+        media_type="application/pdf"
+    )
+
 # ===== NEW: AGENT REVIEW AND APPROVAL =====
 @app.post("/agent_review/{lead_id}")
 async def agent_review_contract(lead_id: int, action: str = Body(..., embed=True), notes: str = Body("", embed=True)):
@@ -565,9 +756,6 @@ async def agent_review_contract(lead_id: int, action: str = Body(..., embed=True
     if action not in valid_actions:
         raise HTTPException(status_code=400, detail=f"Action must be one of: {valid_actions}")
     
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-    
     # Determine new status based on action
     status_map = {
         'approve': 'docusign_ready',
@@ -576,22 +764,19 @@ async def agent_review_contract(lead_id: int, action: str = Body(..., embed=True
     }
     new_status = status_map[action]
     
-    async with engine.begin() as conn:
+    async with POOL.acquire() as conn:
         await conn.execute(
-            text("""
+            """
                 UPDATE leads 
-                SET status = :status, agent_notes = :notes, reviewed_at = :reviewed_at
-                WHERE id = :id
-            """),
-            {
-                "status": new_status,
-                "notes": notes,
-                "reviewed_at": datetime.datetime.now(),
-                "id": lead_id
-            }
+                SET status = $1, agent_notes = $2, reviewed_at = $3
+                WHERE id = $4
+            """,
+            new_status,
+            notes,
+            datetime.datetime.now(),
+            lead_id
         )
-    
-    await engine.dispose()
+    invalidate_dashboard()
     
     return {
         "success": True,
@@ -601,58 +786,100 @@ async def agent_review_contract(lead_id: int, action: str = Body(..., embed=True
         "notes": notes
     }
 
+# ===== LEAD LISTING (keyset-paginated, newest first) =====
+# Separate statements for the first page and later pages: a single "$2 IS NULL OR id < $2"
+# turns into a filter (not an index bound) once Postgres switches to a generic plan
+LIST_LEADS_SQL = """
+    SELECT id, name, email, service, status, created_at
+    FROM leads
+    ORDER BY id DESC
+    LIMIT $1
+"""
+LIST_LEADS_BEFORE_SQL = """
+    SELECT id, name, email, service, status, created_at
+    FROM leads
+    WHERE id < $2
+    ORDER BY id DESC
+    LIMIT $1
+"""
+
+@app.get("/leads")
+async def list_leads(limit: int = Query(100, ge=1, le=500), before: Optional[int] = None):
+    """
+    Page through leads newest-first; pass the returned next_cursor as `before`
+    """
+    async with POOL.acquire() as conn:
+        if before is None:
+            rows = await conn.fetch(LIST_LEADS_SQL, limit)
+        else:
+            rows = await conn.fetch(LIST_LEADS_BEFORE_SQL, limit, before)
+
+    return {
+        "leads": [dict(row) for row in rows],
+        "next_cursor": rows[-1]["id"] if len(rows) == limit else None
+    }
+
+@app.get("/leads/count")
+async def count_leads():
+    async with POOL.acquire() as conn:
+        total = await conn.fetchval("SELECT count(*) FROM leads")
+    return {"total": total}
+
 # ===== NEW: DEADLINE MONITORING =====
+# Deadline arithmetic and the 3-day window are evaluated in Postgres; only approaching
+# deadlines come back. The first row always carries the active-transaction count.
+APPROACHING_DEADLINES_SQL = """
+    WITH active AS (
+        SELECT id, name, status, COALESCE(created_at::date, CURRENT_DATE) AS contract_date
+        FROM leads
+        WHERE status IN ('contract_drafted', 'docusign_ready', 'pending_signatures')
+    )
+    SELECT t.total_active, a.id, a.name, a.status, d.deadline_type, d.deadline_date,
+           d.deadline_date - CURRENT_DATE AS days_until
+    FROM (SELECT count(*) AS total_active FROM active) t
+    LEFT JOIN (
+        active a
+        CROSS JOIN LATERAL (
+            SELECT v.deadline_type, v.ord, a.contract_date + v.days AS deadline_date
+            FROM (VALUES {deadline_values}) AS v(deadline_type, ord, days)
+        ) d
+    ) ON d.deadline_date BETWEEN CURRENT_DATE AND CURRENT_DATE + 3
+    ORDER BY a.id, d.ord
+""".format(deadline_values=", ".join(
+    f"('{deadline_type}', {ord}, {days})"
+    for ord, (deadline_type, days) in enumerate(PURCHASE_DEADLINE_DAYS.items())
+))
+
 @app.get("/deadlines")
 async def get_upcoming_deadlines():
     """
     NEW ENDPOINT: Get all upcoming deadlines across active transactions
     For agent dashboard and follow-up automation
     """
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-
-    async with engine.connect() as conn:
-        result = await conn.execute(
-            text("""
-                SELECT id, name, status, created_at, realist_data 
-                FROM leads 
-                WHERE status IN ('contract_drafted', 'docusign_ready', 'pending_signatures')
-            """)
-        )
-        active_leads = result.fetchall()
-
-    await engine.dispose()
+    async with POOL.acquire() as conn:
+        rows = await conn.fetch(APPROACHING_DEADLINES_SQL)
 
+    # Group the approaching deadlines (within 3 days) under their lead
     deadline_summary = []
-    today = datetime.date.today()
-    
-    for lead in active_leads:
-        # Calculate deadlines based on contract creation date
-        contract_date = lead[3].date() if lead[3] else today
-        deadlines = calculate_transaction_deadlines(contract_date)
-        
-        # Check which deadlines are approaching (within 3 days)
-        approaching = []
-        for deadline_type, deadline_date in deadlines.items():
-            days_until = (deadline_date - today).days
-            if 0 <= days_until <= 3:
-                approaching.append({
-                    "type": deadline_type,
-                    "date": deadline_date.isoformat(),
-                    "days_until": days_until
-                })
-        
-        if approaching:
+    for row in rows:
+        if row["id"] is None:
+            continue
+        if not deadline_summary or deadline_summary[-1]["lead_id"] != row["id"]:
             deadline_summary.append({
-                "lead_id": lead[0],
-                "lead_name": lead[1],
-                "status": lead[2],
-                "approaching_deadlines": approaching
+                "lead_id": row["id"],
+                "lead_name": row["name"],
+                "status": row["status"],
+                "approaching_deadlines": []
             })
+        deadline_summary[-1]["approaching_deadlines"].append({
+            "type": row["deadline_type"],
+            "date": row["deadline_date"].isoformat(),
+            "days_until": row["days_until"]
+        })
     
     return {
         "upcoming_deadlines": deadline_summary,
-        "total_active_transactions": len(active_leads)
+        "total_active_transactions": rows[0]["total_active"]
     }
 
 # Enhanced status update endpoint
@@ -669,51 +896,58 @@ async def update_status(lead_id: int, new_status: str = Body(..., embed=True)):
     if new_status.lower() not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Status must be one of: {valid_statuses}")
     
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-
-    async with engine.begin() as conn:
-        await conn.execute(
-            text("UPDATE leads SET status = :status WHERE id = :id"),
-            {"status": new_status.lower(), "id": lead_id}
-        )
+    async with POOL.acquire() as conn:
+        await conn.execute("UPDATE leads SET status = $1 WHERE id = $2", new_status.lower(), lead_id)
+    invalidate_dashboard()
 
-    await engine.dispose()
     return {"success": True, "updated_id": lead_id, "new_status": new_status}
 
 # ===== NEW: BATCH FOLLOW-UP TRIGGER =====
+# Caps concurrent outbound follow-ups so email/SMS providers aren't flooded
+FOLLOWUP_CONCURRENCY = asyncio.Semaphore(20)
+# Pending leads are read in keyset pages of this size; no connection is held while a
+# page's follow-ups run
+FOLLOWUP_BATCH_SIZE = 1000
+PENDING_FOLLOWUPS_SQL = text("""
+    SELECT id, name, email, status 
+    FROM leads 
+    WHERE status IN ('pending_signatures', 'awaiting_review') AND id > :after_id
+    ORDER BY id
+    LIMIT :limit
+""")
+
+async def process_followup(lead) -> Dict[str, Any]:
+    """Run the follow-up for a single pending lead"""
+    async with FOLLOWUP_CONCURRENCY:
+        # TODO: Implement actual email/SMS follow-up logic
+        return {
+            "lead_id": lead["id"],
+            "name": lead["name"],
+            "email": lead["email"],
+            "status": lead["status"],
+            "action": "follow_up_scheduled"  # Placeholder
+        }
+
 @app.post("/trigger_followups")
-async def trigger_followups():
+async def trigger_followups(db: AsyncSession = Depends(get_db)):
     """
     NEW ENDPOINT: Manually trigger follow-up sequence for pending items
     Later this will be automated via cron job
     """
-    DATABASE_URL = get_database_url()
-    engine = create_async_engine(DATABASE_URL, echo=False)
-
-    async with engine.connect() as conn:
-        result = await conn.execute(
-            text("""
-                SELECT id, name, email, status 
-                FROM leads 
-                WHERE status IN ('pending_signatures', 'awaiting_review')
-            """)
-        )
-        pending_leads = result.fetchall()
-
-    await engine.dispose()
-
-    # TODO: Implement actual email/SMS follow-up logic
+    # The response lists every result, so those still accumulate; only the lead rows are paged
     follow_up_results = []
-    for lead in pending_leads:
-        # Placeholder for follow-up logic
-        follow_up_results.append({
-            "lead_id": lead[0],
-            "name": lead[1],
-            "email": lead[2],
-            "status": lead[3],
-            "action": "follow_up_scheduled"  # Placeholder
-        })
+    after_id = 0
+    while True:
+        # Short transaction per page: the connection goes back to the pool before the sends
+        async with db.begin():
+            result = await db.execute(PENDING_FOLLOWUPS_SQL, {"after_id": after_id, "limit": FOLLOWUP_BATCH_SIZE})
+            pending_leads = result.mappings().all()
+        if not pending_leads:
+            break
+
+        # Leads are independent, so each page's follow-ups overlap instead of running one by one
+        follow_up_results.extend(await asyncio.gather(*(process_followup(lead) for lead in pending_leads)))
+        after_id = pending_leads[-1]["id"]
     
     return {
         "success": True,
@@ -723,7 +957,7 @@ async def trigger_followups():
 
 # ===== NEW: HEALTH CHECK FOR INTEGRATIONS =====
 @app.get("/health")
-async def health_check():
+async def health_check(db: AsyncSession = Depends(get_db)):
     """
     NEW ENDPOINT: Check system health and integration status
     """
@@ -735,11 +969,7 @@ async def health_check():
     
     # Check database
     try:
-        DATABASE_URL = get_database_url()
-        engine = create_async_engine(DATABASE_URL, echo=False)
-        async with engine.connect() as conn:
-            await conn.execute(text("SELECT 1"))
-        await engine.dispose()
+        await db.execute(text("SELECT 1"))
         health_status["database"] = "healthy"
     except:
         health_status["database"] = "error"
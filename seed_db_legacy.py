@@ -22,9 +22,10 @@ demo_leads = [
     ("Michael Brown", "michael@example.com", "Rental Inquiry", "DocuSign Mock Ready")
 ]
 
-cursor.executemany("INSERT INTO leads (name, email, service, status) VALUES (?, ?, ?, ?)", demo_leads)
+# one transaction for the whole batch
+with conn:
+    cursor.executemany("INSERT INTO leads (name, email, service, status) VALUES (?, ?, ?, ?)", demo_leads)
 
-conn.commit()
 conn.close()
 
 print("✅ Seed data inserted into mira.db")
\ No newline at end of file
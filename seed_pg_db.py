@@ -3,19 +3,24 @@ import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
 import os
+from db_url import get_database_url
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = get_database_url()
+
+DEMO_LEADS = [
+    {"name": "Alice Johnson", "email": "alice@example.com", "service": "Buyer Representation", "status": "new"},
+    {"name": "Bob Smith", "email": "bob@example.com", "service": "Seller Listing", "status": "contract_drafted"},
+    {"name": "Carla Reyes", "email": "carla@example.com", "service": "Purchase Agreement", "status": "docusign_ready"}
+]
 
 async def seed():
-    engine = create_async_engine(DATABASE_URL, echo=True)
+    engine = create_async_engine(DATABASE_URL, echo=os.getenv("SQL_ECHO", "0") == "1")
     async with engine.begin() as conn:
-        # Insert demo leads
-        await conn.execute(text("""
-            INSERT INTO leads (name, email, service, status) VALUES
-            ('Alice Johnson', 'alice@example.com', 'Buyer Representation', 'new'),
-            ('Bob Smith', 'bob@example.com', 'Seller Listing', 'contract generated'),
-            ('Carla Reyes', 'carla@example.com', 'Purchase Agreement', 'DocuSign Ready')
-        """))
+        # Insert demo leads: one prepared statement, executed once per row
+        await conn.execute(
+            text("INSERT INTO leads (name, email, service, status) VALUES (:name, :email, :service, :status)"),
+            DEMO_LEADS
+        )
 
     await engine.dispose()
     print("✅ Demo leads inserted into Postgres!")